@@ -0,0 +1,18 @@
+// Proxy prefs enforced on the I2P profile's user.js. This file is the single
+// source for them: startapp.sh applies it on every boot, the Dockerfile
+// appends it to the default user.js and run_onion_portal.py reads it when
+// syncing running containers.
+user_pref("network.proxy.http", "127.0.0.1");
+user_pref("network.proxy.http_port", 4444);
+user_pref("network.proxy.share_proxy_settings", false);
+user_pref("network.proxy.socks", "");
+user_pref("network.proxy.socks_port", 0);
+user_pref("network.proxy.socks_version", 5);
+user_pref("network.proxy.ssl", "127.0.0.1");
+user_pref("network.proxy.ssl_port", 4444);
+user_pref("network.proxy.type", 1);
+user_pref("network.proxy.no_proxies_on", "localhost,127.0.0.1");
+user_pref("network.proxy.allow_hijacking_localhost", true);
+user_pref("network.proxy.socks_remote_dns", false);
+user_pref("media.peerconnection.ice.proxy_only", true);
+user_pref("keyword.enabled", false);
@@ -10,6 +10,7 @@ I2P_LOG_DIR="${I2P_LOG_DIR:-${I2P_CONFIG_DIR}/logs}"
 I2P_PID_DIR="${I2P_PID_DIR:-${I2P_CONFIG_DIR}}"
 FIREFOX_DIR="${CONFIG_DIR}/firefox"
 PROFILE_DIR="${FIREFOX_DIR}/i2p.default"
+PROXY_PREFS_FILE="/defaults/proxy-prefs.js"
 FIREFOX_BIN="$(command -v firefox-esr || command -v firefox)"
 ROUTER_PID_FILE="${I2P_PID_DIR}/router.pid"
 FIREFOX_WINDOW_NAME="Mozilla Firefox"
@@ -56,6 +57,19 @@ if [ ! -d "${I2P_CONFIG_DIR}" ] || [ -z "$(ls -A "${I2P_CONFIG_DIR}" 2>/dev/null
     cp -a /defaults/config/.i2p/. "${I2P_CONFIG_DIR}/" 2>/dev/null || true
 fi
 
+if [ -f "${PROXY_PREFS_FILE}" ] && [ -f "${PROFILE_DIR}/user.js" ]; then
+    echo "[startapp] Enforcing proxy preferences in ${PROFILE_DIR}/user.js"
+    prefs_tmp="$(mktemp)"
+    awk -F'"' '
+        NR == FNR { if ($1 ~ /^[[:space:]]*user_pref\($/) keys[$2] = 1; next }
+        $1 ~ /^[[:space:]]*user_pref\($/ && ($2 in keys) { next }
+        { print }
+    ' "${PROXY_PREFS_FILE}" "${PROFILE_DIR}/user.js" > "${prefs_tmp}"
+    grep '^[[:space:]]*user_pref(' "${PROXY_PREFS_FILE}" >> "${prefs_tmp}"
+    cat "${prefs_tmp}" > "${PROFILE_DIR}/user.js"
+    rm -f "${prefs_tmp}"
+fi
+
 if [ "$(id -u)" -eq 0 ]; then
     chown -R "${APP_USER}:${APP_USER}" "${CONFIG_DIR}"
 fi
@@ -1,22 +1,110 @@
 #!/usr/bin/env python3
+import hashlib
+import io
+import json
 import os
+import platform
+import re
+import shlex
 import shutil
 import subprocess
 import sys
 import time
-import textwrap
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Sequence, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Pattern, Sequence, Tuple
 
+if TYPE_CHECKING:
+    import tarfile
 
-def supports_color() -> bool:
-    if not sys.stdout.isatty():
-        return False
-    if shutil.which("tput") is None:
+
+# CPython only takes the posix_spawn() fast path (no fork of this process)
+# when close_fds is false and the executable is given as a path. Our own
+# descriptors are already non-inheritable (PEP 446), so nothing leaks.
+_SPAWN_CLOSE_FDS = False
+
+
+_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "darkweb_portal"
+_ENV_CACHE_PATH = _CACHE_DIR / "env.json"
+_BUILD_HASH_PATH = _CACHE_DIR / "ctx.hash"
+_ENV_CACHE: Optional[Dict[str, object]] = None
+
+
+def _compose_plugin_dirs() -> List[Path]:
+    # Search path the docker CLI uses for plugins such as `docker compose`.
+    docker_config = os.environ.get("DOCKER_CONFIG") or str(Path.home() / ".docker")
+    return [
+        Path(docker_config) / "cli-plugins",
+        Path("/usr/local/lib/docker/cli-plugins"),
+        Path("/usr/local/libexec/docker/cli-plugins"),
+        Path("/usr/lib/docker/cli-plugins"),
+        Path("/usr/libexec/docker/cli-plugins"),
+    ]
+
+
+def _binary_stamp(path: Optional[str]) -> Optional[List[object]]:
+    if not path:
+        return None
+    try:
+        return [path, os.stat(path).st_mtime_ns]
+    except OSError:
+        return None
+
+
+def _env_cache_key() -> Dict[str, object]:
+    # Stat the binaries instead of running them: installing, removing or
+    # upgrading docker, the compose plugin or docker-compose changes one of
+    # these stamps, which is enough to invalidate the cached probes.
+    plugins = [
+        _binary_stamp(str(directory / "docker-compose"))
+        for directory in _compose_plugin_dirs()
+    ]
+    return {
+        "uname": [platform.system(), platform.node(), platform.release(), platform.machine()],
+        "docker": _binary_stamp(shutil.which("docker")),
+        "compose_plugins": [stamp for stamp in plugins if stamp is not None],
+        "docker_compose": _binary_stamp(shutil.which("docker-compose")),
+        "term": os.environ.get("TERM", ""),
+    }
+
+
+def _load_env_cache() -> Dict[str, object]:
+    global _ENV_CACHE
+    if _ENV_CACHE is not None:
+        return _ENV_CACHE
+
+    _ENV_CACHE = {}
+    try:
+        data = json.loads(_ENV_CACHE_PATH.read_text())
+    except (OSError, ValueError):
+        return _ENV_CACHE
+    if isinstance(data, dict) and data.get("key") == _env_cache_key():
+        _ENV_CACHE = data
+    return _ENV_CACHE
+
+
+def _save_env_cache(**values: object) -> None:
+    cache = _load_env_cache()
+    cache.update(values)
+    cache["key"] = _env_cache_key()
+    try:
+        _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _ENV_CACHE_PATH.write_text(json.dumps(cache))
+    except OSError:
+        pass
+
+
+def _probe_color_support() -> bool:
+    tput_bin = shutil.which("tput")
+    if tput_bin is None:
         return False
     try:
         result = subprocess.run(
-            ["tput", "colors"], check=False, capture_output=True, text=True
+            [tput_bin, "colors"],
+            check=False,
+            capture_output=True,
+            text=True,
+            close_fds=_SPAWN_CLOSE_FDS,
         )
     except Exception:
         return False
@@ -29,6 +117,17 @@ def supports_color() -> bool:
     return count >= 8
 
 
+def supports_color() -> bool:
+    if not sys.stdout.isatty():
+        return False
+    cached = _load_env_cache().get("supports_color")
+    if isinstance(cached, bool):
+        return cached
+    result = _probe_color_support()
+    _save_env_cache(supports_color=result)
+    return result
+
+
 if supports_color():
     C_RESET = "\033[0m"
     C_BOLD = "\033[1m"
@@ -54,23 +153,14 @@ SERVICE_URLS: Sequence[Tuple[str, str]] = (
     ("I2P Router Console", "http://localhost:7657"),
 )
 I2P_SERVICE_NAME = "i2p-browser"
-I2P_PROXY_PREFS = {
-    "network.proxy.http": "127.0.0.1",
-    "network.proxy.http_port": 4444,
-    "network.proxy.share_proxy_settings": False,
-    "network.proxy.socks": "",
-    "network.proxy.socks_port": 0,
-    "network.proxy.socks_version": 5,
-    "network.proxy.ssl": "127.0.0.1",
-    "network.proxy.ssl_port": 4444,
-    "network.proxy.type": 1,
-    "network.proxy.no_proxies_on": "localhost,127.0.0.1",
-    "network.proxy.allow_hijacking_localhost": True,
-    "network.proxy.socks_remote_dns": False,
-    "media.peerconnection.ice.proxy_only": True,
-    "keyword.enabled": False,
-}
+I2P_PREFS_DIR = "/config/firefox/i2p.default"
+I2P_PREFS_PATH = f"{I2P_PREFS_DIR}/user.js"
+# The proxy prefs live in the I2P build context; startapp.sh enforces the
+# same file inside the container on every boot.
+I2P_PROXY_PREFS_FILE = Path("i2p") / "proxy-prefs.js"
+_USER_PREF_KEY_RE = re.compile(r'^\s*user_pref\("([^"]+)",')
 _COMPOSE_CMD: Optional[List[str]] = None
+_CONTAINER_IDS: Dict[Tuple[str, str], str] = {}
 
 
 def log_info(msg: str) -> None:
@@ -85,8 +175,23 @@ def log_err(msg: str) -> None:
     print(f"{C_RED}[ERR]{C_RESET} {msg}", file=sys.stderr)
 
 
-def run_command(args: Sequence[str], capture: bool = False) -> subprocess.CompletedProcess:
-    return subprocess.run(args, check=False, capture_output=capture, text=True)
+def run_command(
+    args: Sequence[str], capture: bool = False, text: bool = True
+) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        args,
+        check=False,
+        capture_output=capture,
+        text=text,
+        close_fds=_SPAWN_CLOSE_FDS,
+    )
+
+
+_COMPOSE_CMD_ENV = "DARKWEB_PORTAL_COMPOSE_CMD"
+
+
+def _compose_cmd_override() -> str:
+    return os.environ.get(_COMPOSE_CMD_ENV, "").strip()
 
 
 def get_compose_base_cmd() -> Optional[List[str]]:
@@ -94,16 +199,47 @@ def get_compose_base_cmd() -> Optional[List[str]]:
     if _COMPOSE_CMD is not None:
         return _COMPOSE_CMD
 
+    override = _compose_cmd_override()
+    if override:
+        try:
+            parts = shlex.split(override)
+        except ValueError as exc:
+            log_err(f"{_COMPOSE_CMD_ENV} no es válido ({override!r}): {exc}.")
+            return None
+        # Resolve like the probed paths so a typo or a missing binary is
+        # reported instead of raising FileNotFoundError from run_compose.
+        executable = shutil.which(parts[0]) if parts else None
+        if not executable:
+            log_err(
+                f"{_COMPOSE_CMD_ENV}={override!r}: no se encontró el ejecutable "
+                f"{parts[0] if parts else override!r}."
+            )
+            return None
+        _COMPOSE_CMD = [executable, *parts[1:]]
+        return _COMPOSE_CMD
+
+    cached = _load_env_cache().get("compose_cmd")
+    if (
+        isinstance(cached, list)
+        and cached
+        and all(isinstance(part, str) for part in cached)
+        and os.path.exists(cached[0])
+    ):
+        _COMPOSE_CMD = cached
+        return _COMPOSE_CMD
+
     docker_bin = shutil.which("docker")
     if docker_bin:
         result = run_command([docker_bin, "compose", "version"], capture=True)
         if result.returncode == 0:
             _COMPOSE_CMD = [docker_bin, "compose"]
+            _save_env_cache(compose_cmd=_COMPOSE_CMD)
             return _COMPOSE_CMD
 
     docker_compose_bin = shutil.which("docker-compose")
     if docker_compose_bin:
         _COMPOSE_CMD = [docker_compose_bin]
+        _save_env_cache(compose_cmd=_COMPOSE_CMD)
         return _COMPOSE_CMD
 
     return None
@@ -116,6 +252,9 @@ def run_compose(
 ) -> Optional[subprocess.CompletedProcess]:
     cmd = get_compose_base_cmd()
     if not cmd:
+        if _compose_cmd_override():
+            # get_compose_base_cmd already reported the bad override.
+            return None
         log_err(
             "Docker Compose no está disponible. Instala Docker Compose V2 "
             "(docker compose) o V1 (docker-compose)."
@@ -133,28 +272,170 @@ def run_compose(
     return run_command(full_cmd, capture=capture)
 
 
+def _resolve_container_id(compose_file: Path, service: str) -> Optional[str]:
+    key = (str(compose_file), service)
+    cached = _CONTAINER_IDS.get(key)
+    if cached:
+        return cached
+
+    docker_bin = shutil.which("docker")
+    if not docker_bin:
+        return None
+
+    result = run_command(
+        [
+            docker_bin,
+            "ps",
+            "-q",
+            "--filter",
+            f"label=com.docker.compose.project={PROJECT_NAME}",
+            "--filter",
+            f"label=com.docker.compose.service={service}",
+        ],
+        capture=True,
+    )
+    if result.returncode != 0:
+        return None
+    ids = (result.stdout or "").split()
+    if not ids:
+        return None
+    _CONTAINER_IDS[key] = ids[0]
+    return ids[0]
+
+
+def _forget_container_ids() -> None:
+    _CONTAINER_IDS.clear()
+
+
+def _yaml_scalar(raw: str) -> str:
+    value = raw.strip()
+    if value[:1] in {"'", '"'}:
+        end = value.find(value[0], 1)
+        return value[1:end] if end != -1 else ""
+    return value.split(" #", 1)[0].strip()
+
+
+def _compose_build_inputs(compose_file: Path, compose_text: str) -> Optional[List[Path]]:
+    # A small line-based reader for the `build:` keys of a compose file. It
+    # understands `build: <path>` and the block form with `context:` and
+    # `dockerfile:`; anything else returns None so the caller rebuilds.
+    base = compose_file.parent
+    lines = compose_text.splitlines()
+    inputs: List[Path] = []
+    for index, line in enumerate(lines):
+        match = re.match(r"^(\s*)build:(.*)$", line)
+        if not match:
+            continue
+        indent = len(match.group(1))
+        value = _yaml_scalar(match.group(2))
+        if value:
+            if value[0] in "{[|>&*":
+                return None
+            context, dockerfile = value, None
+        else:
+            context = None
+            dockerfile = None
+            for child in lines[index + 1:]:
+                if not child.strip() or child.lstrip().startswith("#"):
+                    continue
+                if len(child) - len(child.lstrip()) <= indent:
+                    break
+                key, _, raw = child.strip().partition(":")
+                if key == "context":
+                    context = _yaml_scalar(raw)
+                elif key == "dockerfile":
+                    dockerfile = _yaml_scalar(raw)
+                elif key in {"additional_contexts", "<<"}:
+                    return None
+            if not context:
+                return None
+        if "://" in context or context.startswith("git@"):
+            return None
+        root = (base / context).resolve()
+        if not root.is_dir():
+            return None
+        inputs.append(root)
+        if dockerfile:
+            path = (root / dockerfile).resolve()
+            if root not in path.parents:
+                inputs.append(path)
+    return inputs
+
+
+def _build_context_hash(compose_file: Path) -> Optional[str]:
+    # Cover the compose file itself plus every file in the build contexts it
+    # references, so any change to a Dockerfile or a COPY'd file is seen.
+    # None means "cannot tell", which makes start_stack pass --build.
+    try:
+        compose_text = compose_file.read_bytes()
+    except OSError:
+        return None
+    inputs = _compose_build_inputs(compose_file, compose_text.decode(errors="replace"))
+    if inputs is None:
+        return None
+
+    digest = hashlib.blake2b(digest_size=32)
+    digest.update(str(compose_file).encode())
+    digest.update(b"\0")
+    digest.update(compose_text)
+
+    for root in sorted(set(inputs)):
+        digest.update(b"\0" + str(root).encode())
+        if root.is_file():
+            files = [root]
+        else:
+            files = []
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames.sort()
+                files.extend(Path(dirpath) / name for name in sorted(filenames))
+        for path in files:
+            try:
+                data = path.read_bytes()
+            except OSError:
+                return None
+            digest.update(b"\0" + str(path).encode() + b"\0")
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def _read_build_hash() -> Optional[str]:
+    try:
+        return _BUILD_HASH_PATH.read_text().strip() or None
+    except OSError:
+        return None
+
+
+def _write_build_hash(value: str) -> None:
+    try:
+        _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _BUILD_HASH_PATH.write_text(value + "\n")
+    except OSError:
+        pass
+
+
 def print_service_urls() -> None:
-    print()
-    print(f"{C_YELLOW}URLs de acceso a los servicios:{C_RESET}")
+    parts = ["\n", f"{C_YELLOW}URLs de acceso a los servicios:{C_RESET}\n"]
     for label, url in SERVICE_URLS:
-        print(f"  {C_BOLD}{label}:{C_RESET} {url}")
-    print()
+        parts.append(f"  {C_BOLD}{label}:{C_RESET} {url}\n")
+    parts.append("\n")
+    sys.stdout.write("".join(parts))
+    sys.stdout.flush()
 
 
 def start_stack(compose_file: Path) -> None:
     log_info("Iniciando Darkweb Portal (Tor + I2P)...")
-    result = run_compose(compose_file, ["up", "-d", "--build"])
+    # Compose still builds images that are missing, so --build is only
+    # needed when a build context changed since the last successful build.
+    build_hash = _build_context_hash(compose_file)
+    rebuild = build_hash is None or build_hash != _read_build_hash()
+    _forget_container_ids()
+    result = run_compose(compose_file, ["up", "-d", "--build"] if rebuild else ["up", "-d"])
     if result is None:
         return
     if result.returncode == 0:
+        if rebuild and build_hash is not None:
+            _write_build_hash(build_hash)
         log_ok("Darkweb Portal en ejecución.")
-        if wait_for_service(compose_file, I2P_SERVICE_NAME, timeout=120):
-            ensure_i2p_proxy_settings(compose_file)
-        else:
-            log_err(
-                "No fue posible verificar el navegador I2P en ejecución; "
-                "no se aplicaron los ajustes de proxy."
-            )
         print_service_urls()
     else:
         log_err(f"No se pudo iniciar Darkweb Portal (código {result.returncode}).")
@@ -162,12 +443,15 @@ def start_stack(compose_file: Path) -> None:
 
 def connect_existing_stack(compose_file: Path) -> None:
     log_info("Conectando a contenedores ya existentes (sin rebuild)...")
+    _forget_container_ids()
     result = run_compose(compose_file, ["up", "-d", "--no-build"])
     if result is None:
         return
     if result.returncode == 0:
         log_ok("Contenedores existentes en ejecución.")
-        if wait_for_service(compose_file, I2P_SERVICE_NAME, timeout=60):
+        # Images built before the proxy prefs moved into startapp.sh do not
+        # enforce them on boot, so keep syncing them here.
+        if wait_for_services(compose_file, [I2P_SERVICE_NAME], timeout=60):
             ensure_i2p_proxy_settings(compose_file)
         print_service_urls()
     else:
@@ -176,6 +460,7 @@ def connect_existing_stack(compose_file: Path) -> None:
 
 def stop_stack(compose_file: Path) -> None:
     log_info("Deteniendo Darkweb Portal...")
+    _forget_container_ids()
     result = run_compose(compose_file, ["down"])
     if result is None:
         return
@@ -187,6 +472,7 @@ def stop_stack(compose_file: Path) -> None:
 
 def remove_containers(compose_file: Path) -> None:
     log_info("Eliminando contenedores del Darkweb Portal...")
+    _forget_container_ids()
     result = run_compose(compose_file, ["rm", "-sf"])
     if result is None:
         return
@@ -198,9 +484,20 @@ def remove_containers(compose_file: Path) -> None:
 
 def show_status(compose_file: Path) -> None:
     log_info("Estado actual del Darkweb Portal:")
-    result = run_compose(compose_file, ["ps"])
-    if result is None:
+    docker_bin = shutil.which("docker")
+    if not docker_bin:
+        log_err("Docker no está disponible.")
         return
+    result = run_command(
+        [
+            docker_bin,
+            "ps",
+            "--filter",
+            f"label=com.docker.compose.project={PROJECT_NAME}",
+            "--format",
+            "table {{.Names}}\t{{.Status}}\t{{.Ports}}",
+        ]
+    )
     if result.returncode != 0:
         log_err(f"No se pudo obtener el estado (código {result.returncode}).")
 
@@ -224,84 +521,195 @@ def wait_for_service(
     compose_file: Path,
     service: str,
     timeout: int = 120,
-    poll_interval: float = 2.0,
+    poll_interval: float = 0.1,
+    max_interval: float = 2.0,
 ) -> bool:
+    docker_bin = shutil.which("docker")
+    if not docker_bin:
+        return False
+
     deadline = time.time() + timeout
+    interval = poll_interval
     while time.time() < deadline:
-        result = run_compose(
-            compose_file,
-            ["ps", "--services", "--filter", "status=running"],
-            capture=True,
-        )
-        if result is not None and result.returncode == 0:
-            names = [line.strip() for line in (result.stdout or "").splitlines()]
-            if service in names:
-                return True
-        time.sleep(poll_interval)
+        container_id = _resolve_container_id(compose_file, service)
+        if container_id:
+            result = run_command(
+                [
+                    docker_bin,
+                    "inspect",
+                    "--format",
+                    "{{if .State.Health}}{{.State.Health.Status}}{{else}}{{.State.Status}}{{end}}",
+                    container_id,
+                ],
+                capture=True,
+                text=False,
+            )
+            if result.returncode == 0:
+                # Compared as bytes: this runs on every poll and the
+                # output never needs decoding.
+                if result.stdout.strip() in {b"healthy", b"running"}:
+                    return True
+            else:
+                _CONTAINER_IDS.pop((str(compose_file), service), None)
+        # Start polling fast and back off so a slow boot does not spawn
+        # dozens of inspect calls.
+        time.sleep(max(0.0, min(interval, deadline - time.time())))
+        interval = min(interval * 1.5, max_interval)
     return False
 
 
-def ensure_i2p_proxy_settings(compose_file: Path) -> None:
-    python_script = textwrap.dedent(
-        f"""
-        from pathlib import Path
-
-        prefs_path = Path("/config/firefox/i2p.default/user.js")
-        if not prefs_path.exists():
-            raise SystemExit(0)
-
-        desired = {repr(I2P_PROXY_PREFS)}
-
-        def format_value(value):
-            if isinstance(value, str):
-                return '"{{}}".format(value)'
-            if isinstance(value, bool):
-                return "true" if value else "false"
-            return str(value)
-
-        def build_line(key, value):
-            return 'user_pref("{{0}}", {{1}});'.format(key, format_value(value))
-
-        lines = prefs_path.read_text().splitlines()
-        updated_lines = []
-        seen = set()
-
-        for line in lines:
-            stripped = line.strip()
-            if stripped.startswith('user_pref("'):
-                key = stripped.split('"', 2)[1]
-                if key in desired:
-                    updated_lines.append(build_line(key, desired[key]))
-                    seen.add(key)
-                    continue
-            updated_lines.append(line)
-
-        for key, value in desired.items():
-            if key not in seen:
-                updated_lines.append(build_line(key, value))
-
-        prefs_path.write_text("\\n".join(updated_lines) + "\\n")
-        """
-    ).strip()
-
-    shell_script = (
-        "set -e\n"
-        'prefs_file="/config/firefox/i2p.default/user.js"\n'
-        'if [ ! -f "$prefs_file" ]; then\n'
-        "  exit 0\n"
-        "fi\n"
-        "python3 - <<'PY'\n"
-        f"{python_script}\n"
-        "PY\n"
+def wait_for_services(
+    compose_file: Path,
+    services: Sequence[str],
+    timeout: int = 120,
+) -> bool:
+    if not services:
+        return True
+    if len(services) == 1:
+        return wait_for_service(compose_file, services[0], timeout=timeout)
+
+    # Each probe is a blocking `docker inspect` loop, so threads overlap the
+    # waits and the total time is bounded by the slowest service.
+    with ThreadPoolExecutor(max_workers=len(services)) as pool:
+        futures = [
+            pool.submit(wait_for_service, compose_file, service, timeout)
+            for service in services
+        ]
+        return all(future.result() for future in futures)
+
+
+# Built on first use: the stop/status/logs paths never sync prefs, so they
+# should not pay for it.
+_USER_JS_PATCH_CACHE: Dict[Path, Tuple[bytes, Pattern[bytes]]] = {}
+
+
+def _proxy_prefs_file(compose_file: Path) -> Path:
+    # Prefer the copy in the compose file's own build context, and fall back
+    # to the one shipped next to this script for compose files kept elsewhere.
+    candidate = compose_file.parent / I2P_PROXY_PREFS_FILE
+    if candidate.is_file():
+        return candidate
+    return Path(__file__).resolve().parent / I2P_PROXY_PREFS_FILE
+
+
+def _user_js_patch(compose_file: Path) -> Optional[Tuple[bytes, Pattern[bytes]]]:
+    prefs_file = _proxy_prefs_file(compose_file)
+    cached = _USER_JS_PATCH_CACHE.get(prefs_file)
+    if cached is not None:
+        return cached
+
+    try:
+        text = prefs_file.read_text()
+    except OSError:
+        return None
+    lines = []
+    keys = []
+    for line in text.splitlines():
+        match = _USER_PREF_KEY_RE.match(line)
+        if match:
+            lines.append(line.strip())
+            keys.append(match.group(1))
+    if not lines:
+        return None
+    # Bytes, so the container's user.js is filtered without decoding it and
+    # any non-UTF-8 content survives the rewrite untouched.
+    patch = "".join(line + "\n" for line in lines).encode()
+    line_re = re.compile(
+        rb'^\s*user_pref\("(?:%s)",' % b"|".join(re.escape(key).encode() for key in keys)
+    )
+    _USER_JS_PATCH_CACHE[prefs_file] = (patch, line_re)
+    return patch, line_re
+
+
+def _apply_user_js_patch(data: bytes, patch: bytes, line_re: Pattern[bytes]) -> bytes:
+    kept = [line for line in data.splitlines() if not line_re.match(line)]
+    return b"".join(line + b"\n" for line in kept) + patch
+
+
+# How `docker cp` reports a missing source path: newer daemons say
+# "Could not find the file", 20.10-era CLIs "No such container:path".
+_DOCKER_CP_MISSING_MARKERS = ("Could not find the file", "No such container:path")
+
+
+def _read_container_file(
+    docker_bin: str, container_id: str, path: str
+) -> Tuple[int, Optional["tarfile.TarInfo"], bytes, str]:
+    import tarfile
+
+    # `docker cp <cid>:<path> -` streams the file out as a tar archive.
+    result = run_command(
+        [docker_bin, "cp", f"{container_id}:{path}", "-"], capture=True, text=False
+    )
+    stderr = result.stderr.decode(errors="replace")
+    if result.returncode != 0:
+        return result.returncode, None, b"", stderr
+
+    with tarfile.open(fileobj=io.BytesIO(result.stdout), mode="r:") as archive:
+        for member in archive:
+            if member.isfile():
+                handle = archive.extractfile(member)
+                if handle is not None:
+                    return 0, member, handle.read(), stderr
+    return 1, None, b"", stderr
+
+
+def _write_container_file(
+    docker_bin: str, container_id: str, directory: str, info: "tarfile.TarInfo", data: bytes
+) -> int:
+    import tarfile
+
+    info.size = len(data)
+    info.mtime = int(time.time())
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as archive:
+        archive.addfile(info, io.BytesIO(data))
+
+    # `docker cp -a - <cid>:<dir>` extracts a tar stream, keeping the uid/gid
+    # and mode recorded in the archive. communicate() copes with docker
+    # exiting early, e.g. when the container went away after the read.
+    proc = subprocess.Popen(
+        [docker_bin, "cp", "-a", "-", f"{container_id}:{directory}/"],
+        stdin=subprocess.PIPE,
+        close_fds=_SPAWN_CLOSE_FDS,
     )
+    proc.communicate(buffer.getvalue())
+    return proc.returncode
+
+
+def ensure_i2p_proxy_settings(compose_file: Path) -> None:
+    user_js_patch = _user_js_patch(compose_file)
+    if user_js_patch is None:
+        log_err(
+            f"No se pudo leer {_proxy_prefs_file(compose_file)}; "
+            "no se aplicaron los ajustes de proxy."
+        )
+        return
 
-    result = run_compose(
-        compose_file,
-        ["exec", "-T", I2P_SERVICE_NAME, "sh", "-c", shell_script],
+    docker_bin = shutil.which("docker")
+    if not docker_bin:
+        log_err("Docker no está disponible; no se aplicaron los ajustes de proxy de I2P.")
+        return
+    container_id = _resolve_container_id(compose_file, I2P_SERVICE_NAME)
+    if not container_id:
+        log_err(
+            f"No se encontró el contenedor {I2P_SERVICE_NAME}; "
+            "no se aplicaron los ajustes de proxy."
+        )
+        return
+
+    returncode, info, current, stderr = _read_container_file(
+        docker_bin, container_id, I2P_PREFS_PATH
     )
-    if result is None:
+    if returncode != 0 and any(marker in stderr for marker in _DOCKER_CP_MISSING_MARKERS):
         return
-    if result.returncode == 0:
+    if returncode == 0 and info is not None:
+        updated = _apply_user_js_patch(current, *user_js_patch)
+        returncode = _write_container_file(
+            docker_bin, container_id, I2P_PREFS_DIR, info, updated
+        )
+    elif stderr:
+        sys.stderr.write(stderr)
+    if returncode == 0:
         log_ok("Configuración de proxy de I2P sincronizada.")
     else:
         log_err(
@@ -310,9 +718,7 @@ def ensure_i2p_proxy_settings(compose_file: Path) -> None:
         )
 
 
-def print_menu() -> None:
-    os.system("clear" if os.name == "posix" else "cls")
-    logo_lines = r"""
+_LOGO = r"""
 ________                __     __      __      ___.     __________              __         .__   
 \______ \ _____ _______|  | __/  \    /  \ ____\_ |__   \______   \____________/  |______  |  |  
  |    |  \\__  \\_  __ \  |/ /\   \/\/   // __ \| __ \   |     ___/  _ \_  __ \   __\__  \ |  |  
@@ -320,17 +726,31 @@ ________                __     __      __      ___.     __________
 /_______  (____  /__|  |__|_ \  \__/\  /  \___  >___  /  |____|   \____/|__|   |__| (____  /____/
         \/     \/           \/       \/       \/    \/                                   \/      
     """
-    print(f"    {C_MAGENTA}{logo_lines}{C_RESET}")
-    print(f"                {C_BOLD}{C_MAGENTA}+-----------------------------------------+{C_RESET}")
-    print(f"                {C_MAGENTA}|{C_RESET}     [1] Iniciar Darkweb Portal          {C_MAGENTA}|{C_RESET}")
-    print(f"                {C_MAGENTA}|{C_RESET}     [2] Conectar a servicios            {C_MAGENTA}|{C_RESET}")
-    print(f"                {C_MAGENTA}|{C_RESET}     [3] Detener Darkweb Portal          {C_MAGENTA}|{C_RESET}")
-    print(f"                {C_MAGENTA}|{C_RESET}     [4] Eliminar contenedores           {C_MAGENTA}|{C_RESET}")
-    print(f"                {C_MAGENTA}|{C_RESET}     [5] Mostrar estado actual           {C_MAGENTA}|{C_RESET}")
-    print(f"                {C_MAGENTA}|{C_RESET}     [6] Ver logs en vivo                {C_MAGENTA}|{C_RESET}")
-    print(f"                {C_MAGENTA}|{C_RESET}     [7] Mostrar URLs de acceso          {C_MAGENTA}|{C_RESET}")
-    print(f"                {C_MAGENTA}|{C_RESET}     [8] Salir                           {C_MAGENTA}|{C_RESET}")
-    print(f"                {C_BOLD}{C_MAGENTA}+-----------------------------------------+{C_RESET}")
+_CLEAR = "\033[H\033[2J\033[3J" if os.name == "posix" else ""
+_MENU = "\n".join(
+    [
+        f"    {C_MAGENTA}{_LOGO}{C_RESET}",
+        f"                {C_BOLD}{C_MAGENTA}+-----------------------------------------+{C_RESET}",
+        f"                {C_MAGENTA}|{C_RESET}     [1] Iniciar Darkweb Portal          {C_MAGENTA}|{C_RESET}",
+        f"                {C_MAGENTA}|{C_RESET}     [2] Conectar a servicios            {C_MAGENTA}|{C_RESET}",
+        f"                {C_MAGENTA}|{C_RESET}     [3] Detener Darkweb Portal          {C_MAGENTA}|{C_RESET}",
+        f"                {C_MAGENTA}|{C_RESET}     [4] Eliminar contenedores           {C_MAGENTA}|{C_RESET}",
+        f"                {C_MAGENTA}|{C_RESET}     [5] Mostrar estado actual           {C_MAGENTA}|{C_RESET}",
+        f"                {C_MAGENTA}|{C_RESET}     [6] Ver logs en vivo                {C_MAGENTA}|{C_RESET}",
+        f"                {C_MAGENTA}|{C_RESET}     [7] Mostrar URLs de acceso          {C_MAGENTA}|{C_RESET}",
+        f"                {C_MAGENTA}|{C_RESET}     [8] Salir                           {C_MAGENTA}|{C_RESET}",
+        f"                {C_BOLD}{C_MAGENTA}+-----------------------------------------+{C_RESET}",
+    ]
+)
+
+
+def print_menu() -> None:
+    if _CLEAR:
+        sys.stdout.write(_CLEAR + _MENU + "\n")
+    else:
+        os.system("cls")
+        sys.stdout.write(_MENU + "\n")
+    sys.stdout.flush()
 
 
 def back_to_menu() -> None: